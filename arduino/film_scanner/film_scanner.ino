@@ -31,6 +31,10 @@ int last_direction = 0;
 bool motion_locked = false;
 long position = 0;
 
+// Command line being received; parsed when its terminator arrives
+const unsigned int MAX_CMD_LENGTH = 16;
+String cmd_buffer;
+
 void setup() {
   pinMode(STEP_PIN, OUTPUT);
   pinMode(DIR_PIN, OUTPUT);
@@ -40,6 +44,8 @@ void setup() {
   digitalWrite(DIR_PIN, LOW);
   digitalWrite(STEP_PIN, LOW);
   
+  cmd_buffer.reserve(MAX_CMD_LENGTH);
+  
   Serial.begin(115200);
   while (!Serial) {
     ;
@@ -201,11 +207,21 @@ void parse_command(String cmd) {
       Serial.println(command);
       break;
   }
+  
+  // Acknowledge once the command (including any move) has finished
+  Serial.println("OK");
 }
 
 void loop() {
-  if (Serial.available() > 0) {
-    String cmd = Serial.readStringUntil('\n');
-    parse_command(cmd);
+  // Buffer bytes as they come instead of readStringUntil(), which blocks
+  // for the 1 s stream timeout whenever a line ends without '\n'
+  while (Serial.available() > 0) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      parse_command(cmd_buffer);
+      cmd_buffer = "";
+    } else if (cmd_buffer.length() < MAX_CMD_LENGTH) {
+      cmd_buffer += c;
+    }
   }
 }
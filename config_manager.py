@@ -4,33 +4,109 @@ Configuration Manager for Film Scanner
 Handles first-time setup, IP discovery, and persistent settings
 """
 
+import functools
 import json
 import os
+import re
 import socket
-import subprocess
-import sys
 from pathlib import Path
 
+# asyncio, ipaddress, concurrent.futures and icmplib are only needed for
+# network discovery - they are imported there so loading an existing
+# config (get_config / --show) stays fast
+
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
+# Reused stdlib codecs for when orjson isn't installed (config is written compact)
+_JSON_DECODER = json.JSONDecoder()
+_JSON_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+# TCP ports used to detect live hosts during discovery (SSH is the strongest Pi hint)
+PROBE_PORTS = (22, 80)
+PROBE_TIMEOUT = 0.4
+MAX_CONCURRENT_PROBES = 256
+# Film Scanner web server port, probed first to identify a running scanner
+DEFAULT_PORT = 5000
+# Keys /api/status must return for an open port to count as the Film Scanner
+# (port 5000 is also used by e.g. the macOS AirPlay Receiver)
+SCANNER_STATUS_KEYS = ('frame_count', 'strip_count', 'frame_advance')
+SERVICE_CHECK_TIMEOUT = 2.0
+# Default Raspberry Pi OS mDNS names, tried before the subnet sweep
+MDNS_HOSTNAMES = ('raspberrypi.local',)
+# Subnet sizes the sweep accepts: /16 is already 65k hosts, /31 and /32 have none
+MIN_PREFIX_LEN = 16
+MAX_PREFIX_LEN = 30
+# Number of previously discovered Pis remembered in known_hosts.json
+MAX_KNOWN_HOSTS = 5
+# Hostnames that look like a Pi: "raspberry..." or a standalone "pi"/"pi4"/"pizero" token
+_PI_HOSTNAME_RE = re.compile(r'(?:raspberry|\bpi(?:\d+|zero\d*)?\b)', re.IGNORECASE)
+
+def parse_prefix_len(value):
+    """argparse type for --prefix: an int within MIN_PREFIX_LEN..MAX_PREFIX_LEN"""
+    import argparse
+    try:
+        prefix_len = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid prefix length: {value!r}")
+    if not MIN_PREFIX_LEN <= prefix_len <= MAX_PREFIX_LEN:
+        raise argparse.ArgumentTypeError(
+            f"prefix length must be between {MIN_PREFIX_LEN} and {MAX_PREFIX_LEN}")
+    return prefix_len
+
+def _safe_gethostbyaddr(ip):
+    """Reverse-resolve an IP, returning None instead of raising"""
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except OSError:
+        return None
+
+@functools.lru_cache(maxsize=1)
+def _is_raspberry_pi():
+    """Detect a Raspberry Pi from the short device-tree model string"""
+    try:
+        with open('/proc/device-tree/model', 'rb') as f:
+            return b'Raspberry Pi' in f.read(64)
+    except OSError:
+        return False
+
 class ConfigManager:
     def __init__(self, config_file="scanner_config.json"):
         """Initialize config manager with default config file name"""
         self.config_dir = Path.home() / ".film_scanner"
         self.config_file = self.config_dir / config_file
         self.config = {}
+        # Parsed config and the file mtime it was read at
+        self._cache = None
+        self._cache_mtime = None
+        self._local_ip = None
+        self.known_hosts_file = self.config_dir / "known_hosts.json"
         
     def config_exists(self):
         """Check if configuration file exists"""
         return self.config_file.exists()
     
     def load_config(self):
-        """Load configuration from file"""
-        if not self.config_exists():
+        """Load configuration from file (cached until the file changes)
+        
+        Returns a shallow copy so callers can't alter the cached config.
+        """
+        try:
+            st = self.config_file.stat()
+        except OSError:
             return None
         
+        if self._cache is not None and st.st_mtime_ns == self._cache_mtime:
+            return dict(self._cache)
+        
         try:
-            with open(self.config_file, 'r') as f:
-                self.config = json.load(f)
-            return self.config
+            data = self.config_file.read_bytes()
+            self.config = _json_fast.loads(data) if _json_fast else _JSON_DECODER.decode(data.decode('utf-8'))
+            self._cache = self.config
+            self._cache_mtime = st.st_mtime_ns
+            return dict(self.config)
         except Exception as e:
             print(f"Error loading config: {e}")
             return None
@@ -41,9 +117,21 @@ class ConfigManager:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            if _json_fast:
+                payload = _json_fast.dumps(config)
+            else:
+                payload = _JSON_ENCODER.encode(config).encode('utf-8')
+            # Write to a temp file and rename over the target so a crash
+            # mid-write can never leave a truncated config behind
+            tmp_file = self.config_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.config_file)
             self.config = config
+            self._cache = config
+            self._cache_mtime = self.config_file.stat().st_mtime_ns
             return True
         except Exception as e:
             print(f"Error saving config: {e}")
@@ -51,20 +139,24 @@ class ConfigManager:
     
     def delete_config(self):
         """Delete configuration file (for reset)"""
+        self._cache = None
+        self._cache_mtime = None
         try:
-            if self.config_file.exists():
-                self.config_file.unlink()
-                print(f"Configuration deleted: {self.config_file}")
-                return True
-            else:
-                print("No configuration file to delete")
-                return False
+            # Single unlink instead of exists()+unlink() - no stat, no TOCTOU race
+            self.config_file.unlink()
+            print(f"Configuration deleted: {self.config_file}")
+            return True
+        except FileNotFoundError:
+            print("No configuration file to delete")
+            return False
         except Exception as e:
             print(f"Error deleting config: {e}")
             return False
     
     def get_local_ip(self):
-        """Get the local IP address of this machine"""
+        """Get the local IP address of this machine (cached after first lookup)"""
+        if self._local_ip:
+            return self._local_ip
         try:
             # Create a socket to determine local IP
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -72,47 +164,276 @@ class ConfigManager:
             s.connect(("8.8.8.8", 80))
             local_ip = s.getsockname()[0]
             s.close()
+            self._local_ip = local_ip
             return local_ip
         except Exception:
             return "127.0.0.1"
     
-    def scan_network_for_pi(self):
-        """Scan local network for Raspberry Pi devices"""
-        print("\n🔍 Scanning network for Raspberry Pi devices...")
-        print("This may take a moment...\n")
+    def refresh_local_ip(self):
+        """Forget the cached local IP and look it up again"""
+        self._local_ip = None
+        return self.get_local_ip()
+    
+    async def _probe_service(self, ip, port, timeout=PROBE_TIMEOUT, refused_is_alive=False):
+        """Check whether a host accepts a TCP connection on one port
         
-        local_ip = self.get_local_ip()
-        network_prefix = '.'.join(local_ip.split('.')[:-1])
+        With refused_is_alive, a connection reset (closed port) also counts:
+        it proves the host is up even though nothing listens there.
+        """
+        import asyncio
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port), timeout
+            )
+            writer.close()
+            return True
+        except ConnectionRefusedError:
+            return refused_is_alive
+        except (OSError, asyncio.TimeoutError):
+            return False
+    
+    async def _probe_host(self, ip):
+        """Check whether a host is up: it accepts or refuses a connection on a probe port"""
+        for port in PROBE_PORTS:
+            if await self._probe_service(ip, port, refused_is_alive=True):
+                return True
+        return False
+    
+    async def _is_scanner(self, ip, port):
+        """Check that a host's /api/status answers like the Film Scanner"""
+        import asyncio
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port), PROBE_TIMEOUT
+            )
+            try:
+                writer.write(f"GET /api/status HTTP/1.0\r\nHost: {ip}\r\n\r\n".encode('ascii'))
+                await writer.drain()
+                response = await asyncio.wait_for(reader.read(), SERVICE_CHECK_TIMEOUT)
+            finally:
+                writer.close()
+        except (OSError, asyncio.TimeoutError):
+            return False
+        
+        head, _, body = response.partition(b'\r\n\r\n')
+        if b' 200 ' not in head.split(b'\r\n', 1)[0]:
+            return False
+        try:
+            status = _json_fast.loads(body) if _json_fast else _JSON_DECODER.decode(body.decode('utf-8'))
+        except ValueError:
+            return False
+        return isinstance(status, dict) and all(key in status for key in SCANNER_STATUS_KEYS)
+    
+    async def _find_service(self, ips, port):
+        """Return the first address serving the Film Scanner on the scanner port"""
+        import asyncio
+        limit = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+        
+        async def probe(ip):
+            async with limit:
+                if not await self._probe_service(ip, port):
+                    return None
+            # Only open ports get the HTTP check; anything else on the port
+            # is skipped so the sweep below can still find the Pi
+            return ip if await self._is_scanner(ip, port) else None
         
+        tasks = [asyncio.ensure_future(probe(ip)) for ip in ips]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                ip = await next_done
+                if ip:
+                    return ip
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None
+    
+    def _identify_pis(self, responsive):
+        """Reverse-resolve live hosts in parallel and keep the ones that look like a Pi"""
+        from concurrent.futures import ThreadPoolExecutor
         pi_devices = []
+        if not responsive:
+            return pi_devices
         
-        # Quick scan of common addresses
-        for i in range(1, 255):
-            ip = f"{network_prefix}.{i}"
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            for ip, hostname in zip(responsive, executor.map(_safe_gethostbyaddr, responsive)):
+                # A host that responds but has no hostname might still be a Pi,
+                # but we can't tell it apart from anything else
+                if not hostname:
+                    continue
+                if _PI_HOSTNAME_RE.search(hostname):
+                    pi_devices.append({'ip': ip, 'hostname': hostname})
+        return pi_devices
+    
+    def _discover_mdns(self):
+        """Resolve well-known Pi mDNS names before falling back to a sweep"""
+        pi_devices = []
+        for hostname in MDNS_HOSTNAMES:
             try:
-                # Try to connect with a short timeout
-                result = subprocess.run(
-                    ["ping", "-c", "1", "-W", "1", ip],
-                    capture_output=True,
-                    timeout=2
-                )
-                
-                if result.returncode == 0:
-                    # Try to identify if it's a Pi by checking hostname
-                    try:
-                        hostname = socket.gethostbyaddr(ip)[0]
-                        if 'raspberry' in hostname.lower() or 'pi' in hostname.lower():
-                            pi_devices.append({'ip': ip, 'hostname': hostname})
-                            print(f"✓ Found: {ip} ({hostname})")
-                    except:
-                        # If it responds to ping but no hostname, might still be a Pi
-                        pass
-            except:
+                ip = socket.gethostbyname(hostname)
+            except OSError:
                 continue
+            pi_devices.append({'ip': ip, 'hostname': hostname})
+        return pi_devices
+    
+    async def _sweep(self, ips):
+        """Probe all addresses concurrently and return the ones that answered"""
+        import asyncio
+        # Bound open sockets so larger prefixes (/23, /16) don't exhaust file descriptors
+        limit = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+        
+        async def probe(ip):
+            async with limit:
+                return await self._probe_host(ip)
         
+        alive = await asyncio.gather(*(probe(ip) for ip in ips))
+        return [ip for ip, ok in zip(ips, alive) if ok]
+    
+    def _sweep_icmp(self, ips):
+        """Ping all addresses from one unprivileged ICMP socket (None if unavailable)"""
+        try:
+            from icmplib import multiping
+        except ImportError:
+            return None
+        try:
+            hosts = multiping(ips, count=1, timeout=0.5, concurrent_tasks=64, privileged=False)
+        except Exception as e:
+            # Unprivileged ICMP needs net.ipv4.ping_group_range to include our group
+            print(f"ICMP sweep unavailable ({e}), using TCP probes")
+            return None
+        return [host.address for host in hosts if host.is_alive]
+    
+    def _lookup_mac(self, ip):
+        """Read a host's MAC from the kernel ARP table (no subprocess)"""
+        try:
+            with open('/proc/net/arp', 'r') as f:
+                for line in f.readlines()[1:]:
+                    parts = line.split()
+                    if len(parts) >= 4 and parts[0] == ip and parts[3] != '00:00:00:00:00:00':
+                        return parts[3]
+        except OSError:
+            pass
+        return None
+    
+    def _load_known_hosts(self):
+        """Load Pis remembered from previous discoveries"""
+        try:
+            data = self.known_hosts_file.read_bytes()
+            return _json_fast.loads(data) if _json_fast else _JSON_DECODER.decode(data.decode('utf-8'))
+        except (OSError, ValueError):
+            return []
+    
+    def _save_known_hosts(self, pi_devices):
+        """Remember discovered Pis (most recent first) for the next setup run"""
+        known = [dict(device, mac=self._lookup_mac(device['ip'])) for device in pi_devices]
+        seen = {device['ip'] for device in known}
+        known += [host for host in self._load_known_hosts() if host.get('ip') not in seen]
+        known = known[:MAX_KNOWN_HOSTS]
+        try:
+            self.config_dir.mkdir(parents=True, exist_ok=True)
+            if _json_fast:
+                payload = _json_fast.dumps(known)
+            else:
+                payload = _JSON_ENCODER.encode(known).encode('utf-8')
+            # Same temp file + rename as save_config, so a crash never
+            # leaves a truncated known_hosts.json
+            tmp_file = self.known_hosts_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.known_hosts_file)
+        except OSError as e:
+            print(f"Error saving known hosts: {e}")
+    
+    def _check_known_hosts(self, service_port):
+        """Return previously discovered Pis that still answer a probe"""
+        import asyncio
+        
+        async def alive(ip):
+            return await self._probe_service(ip, service_port) or await self._probe_host(ip)
+        
+        pi_devices = []
+        for host in self._load_known_hosts():
+            ip = host.get('ip')
+            if not ip or not asyncio.run(alive(ip)):
+                continue
+            # The probe just populated the ARP entry - if DHCP handed this
+            # address to a different device, it is no longer our Pi
+            mac = self._lookup_mac(ip)
+            if mac and host.get('mac') and mac != host['mac']:
+                print(f"⚠ Known host {ip} now has a different MAC, ignoring")
+                continue
+            pi_devices.append({'ip': ip, 'hostname': host.get('hostname', ip)})
         return pi_devices
     
-    def interactive_setup(self):
+    def scan_network_for_pi(self, prefix_len=24, service_port=DEFAULT_PORT):
+        """Scan local network (/prefix_len around this host) for Raspberry Pi devices"""
+        print("\n🔍 Scanning network for Raspberry Pi devices...")
+        print("This may take a moment...\n")
+        
+        # The interface may have changed since the last scan (e.g. setup retry
+        # after switching WiFi) - don't sweep a stale subnet
+        self.refresh_local_ip()
+        
+        # Pis found on a previous run almost never move - re-check those first
+        pi_devices = self._check_known_hosts(service_port)
+        if pi_devices:
+            for device in pi_devices:
+                print(f"✓ Found known host: {device['ip']} ({device['hostname']})")
+            return pi_devices
+        
+        pi_devices = self._discover(prefix_len, service_port)
+        if pi_devices:
+            self._save_known_hosts(pi_devices)
+        return pi_devices
+    
+    def _discover(self, prefix_len, service_port):
+        """Find Pis via mDNS, the scanner port, then a full subnet sweep"""
+        import asyncio
+        import ipaddress
+        
+        # A Pi advertising itself over mDNS/Avahi answers in one query
+        pi_devices = self._discover_mdns()
+        if pi_devices:
+            for device in pi_devices:
+                print(f"✓ Found via mDNS: {device['ip']} ({device['hostname']})")
+            return pi_devices
+        
+        if not MIN_PREFIX_LEN <= prefix_len <= MAX_PREFIX_LEN:
+            print(f"⚠ Prefix /{prefix_len} out of range (/{MIN_PREFIX_LEN}-/{MAX_PREFIX_LEN}), skipping subnet sweep")
+            return []
+        
+        local_ip = self.get_local_ip()
+        network = ipaddress.ip_network(f"{local_ip}/{prefix_len}", strict=False)
+        # Host addresses via integer math + C-level inet_ntoa rather than
+        # formatting an IPv4Address object per host
+        base = int(network.network_address)
+        ips = [socket.inet_ntoa((base + i).to_bytes(4, 'big'))
+               for i in range(1, network.num_addresses - 1)]
+        ips = [ip for ip in ips if ip != local_ip]
+        
+        # A host already serving the scanner port is the Film Scanner Pi -
+        # one connect per host identifies it, no DNS or hostname guessing
+        service_ip = asyncio.run(self._find_service(ips, service_port))
+        if service_ip:
+            hostname = _safe_gethostbyaddr(service_ip) or service_ip
+            print(f"✓ Found Film Scanner: {service_ip} ({hostname})")
+            return [{'ip': service_ip, 'hostname': hostname}]
+        
+        # Liveness first (ICMP via icmplib, else non-blocking TCP connects
+        # on one event loop), then reverse DNS for the responders only
+        responsive = self._sweep_icmp(ips)
+        if responsive is None:
+            responsive = asyncio.run(self._sweep(ips))
+        pi_devices = self._identify_pis(responsive)
+        
+        for device in pi_devices:
+            print(f"✓ Found: {device['ip']} ({device['hostname']})")
+        
+        return pi_devices
+    
+    def interactive_setup(self, prefix_len=24):
         """Interactive first-time setup wizard"""
         print("\n" + "="*60)
         print("   FILM SCANNER - FIRST TIME SETUP")
@@ -120,12 +441,7 @@ class ConfigManager:
         print("\nWelcome! Let's configure your Film Scanner.\n")
         
         # Check if we're running on the Pi itself
-        try:
-            with open('/proc/cpuinfo', 'r') as f:
-                cpuinfo = f.read()
-                is_raspberry_pi = 'Raspberry Pi' in cpuinfo
-        except:
-            is_raspberry_pi = False
+        is_raspberry_pi = _is_raspberry_pi()
         
         config = {
             'setup_complete': True,
@@ -155,7 +471,7 @@ class ConfigManager:
                 
                 if choice == '1':
                     # Auto-discover
-                    pi_devices = self.scan_network_for_pi()
+                    pi_devices = self.scan_network_for_pi(prefix_len)
                     
                     if not pi_devices:
                         print("\n⚠️  No Raspberry Pi devices found automatically.")
@@ -192,7 +508,9 @@ class ConfigManager:
                         break
                 
                 if choice == '2':
-                    # Manual entry
+                    # Manual entry - the only path that forks, so import here
+                    import subprocess
+                    
                     while True:
                         pi_ip = input("\nEnter Raspberry Pi IP address: ").strip()
                         
@@ -202,9 +520,11 @@ class ConfigManager:
                             
                             # Try to ping it
                             print(f"Testing connection to {pi_ip}...")
+                            # Only the return code matters - don't pipe output back
                             result = subprocess.run(
-                                ["ping", "-c", "2", "-W", "2", pi_ip],
-                                capture_output=True,
+                                ["ping", "-n", "-c", "2", "-W", "2", pi_ip],
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL,
                                 timeout=5
                             )
                             
@@ -212,11 +532,14 @@ class ConfigManager:
                                 print(f"✓ Successfully connected to {pi_ip}")
                                 config['mode'] = 'remote'
                                 config['pi_ip'] = pi_ip
-                                try:
-                                    hostname = socket.gethostbyaddr(pi_ip)[0]
-                                    config['hostname'] = hostname
-                                except:
-                                    config['hostname'] = 'unknown'
+                                # Reverse DNS can block for seconds without a PTR record,
+                                # so only do it on request and default to the IP
+                                config['hostname'] = pi_ip
+                                lookup = input("Look up hostname? (y/n, default: n): ").strip().lower()
+                                if lookup == 'y':
+                                    hostname = _safe_gethostbyaddr(pi_ip)
+                                    if hostname:
+                                        config['hostname'] = hostname
                                 break
                             else:
                                 print(f"⚠️  Could not reach {pi_ip}")
@@ -297,15 +620,14 @@ class ConfigManager:
             print("\n❌ Failed to save configuration")
             return None
     
-    def get_config(self):
-        """Get configuration, running setup if needed"""
-        if self.config_exists():
-            config = self.load_config()
-            if config:
-                return config
+    def get_config(self, prefix_len=24):
+        """Get configuration, running setup (scanning /prefix_len) if needed"""
+        config = self.load_config()
+        if config:
+            return config
         
         # No config exists or failed to load - run setup
-        return self.interactive_setup()
+        return self.interactive_setup(prefix_len)
     
     def print_config(self):
         """Print current configuration"""
@@ -336,6 +658,9 @@ def main():
     parser.add_argument('--reset', action='store_true', help='Delete configuration and run setup again')
     parser.add_argument('--show', action='store_true', help='Show current configuration')
     parser.add_argument('--setup', action='store_true', help='Run setup wizard')
+    parser.add_argument('--prefix', type=parse_prefix_len, default=24,
+                        help=f'Network prefix length to scan for the Pi during setup, '
+                             f'{MIN_PREFIX_LEN}-{MAX_PREFIX_LEN} (default: 24)')
     
     args = parser.parse_args()
     
@@ -348,10 +673,10 @@ def main():
     elif args.show:
         config_mgr.print_config()
     elif args.setup:
-        config_mgr.interactive_setup()
+        config_mgr.interactive_setup(args.prefix)
     else:
         # Just get/create config
-        config = config_mgr.get_config()
+        config = config_mgr.get_config(args.prefix)
         if config:
             config_mgr.print_config()
 
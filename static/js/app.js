@@ -140,22 +140,34 @@ async function createRoll() {
 }
 
 // Optimized motor control with better responsiveness
+// Most jogs merged into one move request
+const MAX_JOG_BATCH = 16;
+
 let motorHoldState = {
     holding: false,
     interval: null,
     button: null,
-    lastMoveTime: 0
+    queue: [],
+    sending: false
 };
 
 async function moveMotor(direction, size) {
-    // Prevent too-frequent calls
-    const now = Date.now();
-    if (now - motorHoldState.lastMoveTime < 50) {
-        return;
+    // Jogs issued while a move is in flight are merged into one request
+    const queue = motorHoldState.queue;
+    const last = queue[queue.length - 1];
+    if (last && last.direction === direction && last.size === size && last.count < MAX_JOG_BATCH) {
+        last.count++;
+    } else {
+        queue.push({ direction, size, count: 1 });
     }
-    motorHoldState.lastMoveTime = now;
     
-    await apiCall('move', { direction, size });
+    if (motorHoldState.sending) return;
+    motorHoldState.sending = true;
+    
+    while (queue.length) {
+        await apiCall('move', queue.shift());
+    }
+    motorHoldState.sending = false;
 }
 
 function startMotorHold(button, direction, size) {
@@ -180,6 +192,8 @@ function stopMotorHold() {
     if (!motorHoldState.holding) return;
     
     motorHoldState.holding = false;
+    // Drop jogs still waiting so the motor stops when the button is released
+    motorHoldState.queue.length = 0;
     
     if (motorHoldState.interval) {
         clearInterval(motorHoldState.interval);
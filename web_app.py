@@ -8,6 +8,8 @@ from flask_socketio import SocketIO, emit
 import serial
 import serial.tools.list_ports
 import subprocess
+import select
+import glob
 import time
 import os
 import sys
@@ -15,19 +17,260 @@ from datetime import datetime
 import json
 import threading
 import base64
-import tempfile
+import atexit
 import shutil
+import tempfile
 import traceback
-from config_manager import ConfigManager
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config_manager import ConfigManager, parse_prefix_len
+try:
+    import termios
+except ImportError:
+    termios = None  # Windows
 try:
     from PIL import Image, ImageOps
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
     print("⚠ PIL/Pillow not available - image preview will be limited")
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+try:
+    import gphoto2 as gp
+    GPHOTO2_LIB_AVAILABLE = True
+except ImportError:
+    GPHOTO2_LIB_AVAILABLE = False
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'film-scanner-secret-key'
 socketio = SocketIO(app, cors_allowed_origins="*")
+# Longest an Arduino takes to reboot and print its banner after the port opens
+ARDUINO_RESET_TIMEOUT = 2.5
+# Silence that ends a reply burst while probing a port
+SERIAL_BURST_GAP = 0.02
+# Seconds a running (not resetting) sketch gets to answer a status query
+ARDUINO_QUERY_TIMEOUT = 0.2
+# Last port the Arduino answered on, probed first on the next start
+ARDUINO_PORT_CACHE = os.path.expanduser('~/.film_scanner/arduino_port')
+# Line the sketch prints after finishing every command
+ARDUINO_ACK = b'OK\r\n'
+# Seconds to wait for the ack of an instant command / of a move of unknown length
+ARDUINO_ACK_TIMEOUT = 0.5
+ARDUINO_MOVE_TIMEOUT = 30.0
+# Most backlash steps the sketch may add to a move
+MAX_BACKLASH_STEPS = 200
+# Minimum seconds between state writes; rapid non-forced saves are coalesced
+STATE_SAVE_INTERVAL = 0.5
+# Seconds a camera detection result is reused for status polling
+CAMERA_CHECK_INTERVAL = 5.0
+# Seconds after a motor command before the film is steady enough to capture
+MOTOR_SETTLE_TIME = 0.5
+# Most jogs one move request may carry (matches MAX_JOG_BATCH in app.js)
+MAX_JOG_BATCH = 16
+def _dump_state(state):
+    """Serialize scan state as compact JSON bytes (orjson if installed)"""
+    if _json_fast:
+        return _json_fast.dumps(state)
+    return json.dumps(state, separators=(',', ':')).encode('utf-8')
+class GPhotoShell:
+    """Persistent `gphoto2 --shell` session
+    
+    Spawning gphoto2 per operation re-initializes USB/PTP every time (~1-2 s).
+    One long-lived shell keeps the camera claimed and takes commands on stdin.
+    """
+    PROMPT_START = b'gphoto2: {'
+    PROMPT = b'/> '
+    
+    def __init__(self, workdir=None):
+        self.proc = None
+        # Local directory the shell saves previews/downloads into
+        self.workdir = workdir
+        self.lock = threading.Lock()
+    
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+    
+    def _start(self):
+        print("📷 Starting persistent gphoto2 session...")
+        self.proc = subprocess.Popen(
+            ["gphoto2", "--shell"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            cwd=self.workdir, bufsize=0
+        )
+        self._read_until_prompt(timeout=15)
+    
+    def _read_until_prompt(self, timeout):
+        """Collect shell output up to the next prompt"""
+        fd = self.proc.stdout.fileno()
+        buf = bytearray()
+        deadline = time.monotonic() + timeout
+        while not buf.endswith(self.PROMPT):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired("gphoto2 --shell", timeout)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                raise RuntimeError("gphoto2 shell exited")
+            buf += chunk
+        # Drop the prompt itself ("gphoto2: {<local dir>} /> ")
+        end = buf.rfind(self.PROMPT_START)
+        return buf[:end].decode('utf-8', errors='ignore')
+    
+    def open(self):
+        """Start the session now (e.g. at startup) instead of on first use"""
+        with self.lock:
+            try:
+                if not self.alive():
+                    self._start()
+                return True
+            except Exception as e:
+                self._close()
+                print(f"⚠ Could not open camera session: {e}")
+                return False
+    
+    def run(self, command, timeout=30):
+        """Run one shell command and return its output (raises on timeout/exit)"""
+        with self.lock:
+            try:
+                if not self.alive():
+                    self._start()
+                self.proc.stdin.write(f"{command}\n".encode())
+                return self._read_until_prompt(timeout)
+            except Exception:
+                # Session is in an unknown state - drop it, next call respawns
+                self._close()
+                raise
+    
+    def _close(self):
+        if self.proc is None:
+            return
+        try:
+            if self.proc.poll() is None:
+                self.proc.stdin.write(b"exit\n")
+                self.proc.wait(timeout=2)
+        except Exception:
+            # Hung session - kill our own process directly and reap it
+            self.proc.kill()
+            try:
+                self.proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                pass
+        self.proc = None
+    
+    def close(self):
+        """End the session and release the camera"""
+        with self.lock:
+            self._close()
+    
+    def read_preview(self):
+        """Read and remove the JPEG written by the last capture-preview (None if missing)"""
+        data = None
+        for name in os.listdir(self.workdir):
+            path = os.path.join(self.workdir, name)
+            if data is None and name.lower().endswith(('.jpg', '.jpeg')):
+                with open(path, 'rb') as f:
+                    data = f.read()
+            # Never leave a stale frame behind for the next preview
+            os.remove(path)
+        return data
+    
+    @staticmethod
+    def error(output):
+        """Return the error text from shell output, or None on success"""
+        if "*** Error" in output or "ERROR:" in output:
+            return output.strip()
+        return None
+class GPhotoLib(GPhotoShell):
+    """In-process libgphoto2 session (python-gphoto2) with the shell's interface
+    
+    Takes the same command strings as GPhotoShell and answers in the same
+    text format, so callers don't care which backend they got. The camera
+    is opened once and previews never touch the filesystem.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.camera = None
+        self._preview = None
+    
+    def alive(self):
+        return self.camera is not None
+    
+    def _start(self):
+        print("📷 Opening camera via libgphoto2...")
+        camera = gp.Camera()
+        camera.init()
+        self.camera = camera
+    
+    def _get_config(self, name):
+        widget = self.camera.get_single_config(name)
+        return f"Label: {widget.get_label()}\nCurrent: {widget.get_value()}\n"
+    
+    def _set_config(self, name, value):
+        widget = self.camera.get_single_config(name)
+        if widget.get_type() in (gp.GP_WIDGET_TOGGLE, gp.GP_WIDGET_DATE):
+            value = int(value)
+        elif widget.get_type() == gp.GP_WIDGET_RANGE:
+            value = float(value)
+        widget.set_value(value)
+        self.camera.set_single_config(name, widget)
+        return ""
+    
+    def _capture_preview(self):
+        camera_file = self.camera.capture_preview()
+        self._preview = bytes(camera_file.get_data_and_size())
+        return ""
+    
+    def run(self, command, timeout=30):
+        """Run one shell-style command in-process (timeout is not enforced)"""
+        verb, _, arg = command.partition(' ')
+        with self.lock:
+            try:
+                if not self.alive():
+                    self._start()
+                if verb == "capture-image":
+                    self.camera.capture(gp.GP_CAPTURE_IMAGE)
+                    return ""
+                if verb == "capture-preview":
+                    return self._capture_preview()
+                if verb == "get-config":
+                    return self._get_config(arg)
+                if verb == "set-config":
+                    name, _, value = arg.partition('=')
+                    return self._set_config(name, value)
+                raise ValueError(f"Unsupported gphoto2 command: {command}")
+            except gp.GPhoto2Error as e:
+                # Report like the shell does; reopen on the next call since
+                # libgphoto2 may have lost the camera
+                self._close()
+                return f"*** Error ({e.code}: '{e.string}') ***"
+            except Exception:
+                self._close()
+                raise
+    
+    def _close(self):
+        if self.camera is None:
+            return
+        try:
+            self.camera.exit()
+        except Exception:
+            pass
+        self.camera = None
+    
+    def read_preview(self):
+        """Return and forget the frame from the last capture-preview (None if missing)"""
+        data, self._preview = self._preview, None
+        return data
 class FilmScanner:
     def __init__(self):
         self.arduino = None
@@ -56,6 +299,9 @@ class FilmScanner:
         # Position tracking
         self.position = 0
         self.frame_positions = []
+        self.last_move_time = 0.0
+        # Set on connect if the sketch answers each command with OK
+        self.arduino_acks = False
         
         # Mode control
         self.mode = 'manual'
@@ -63,12 +309,165 @@ class FilmScanner:
         
         # State persistence
         self.state_file = None
+        self._state_lock = threading.Lock()
+        self._last_save_time = 0.0
+        self._save_timer = None
+        self._last_saved_state = None
         
-        # Lock for thread safety
-        self.lock = threading.Lock()
+        # Serializes Arduino commands (re-entrant: send() retries through itself)
+        self.lock = threading.RLock()
+        
+        # Frame advance started in the background after the previous capture
+        self.advance_thread = None
+        self.prequeued_advance = False
+        self.prequeued_steps = 0
     
         # Lock to prevent gphoto2 conflicts across routes
         self.camera_op_lock = threading.Lock()
+        
+        # Persistent gphoto2 session shared by all camera operations - in
+        # process via python-gphoto2 if installed, else `gphoto2 --shell`
+        # (whose capture-preview writes into preview_dir)
+        if GPHOTO2_LIB_AVAILABLE:
+            self.gphoto = GPhotoLib()
+        else:
+            self.preview_dir = tempfile.mkdtemp(prefix='film_scanner_preview_')
+            self.gphoto = GPhotoShell(workdir=self.preview_dir)
+            # close() also runs to recover a hung session, so the directory
+            # must outlive it - remove it only when the process exits
+            atexit.register(shutil.rmtree, self.preview_dir, ignore_errors=True)
+        
+        # libjpeg-turbo (SIMD) decoder for preview frames, if installed
+        self._tj = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._tj = TurboJPEG()
+            except Exception as e:
+                print(f"⚠ libjpeg-turbo not usable, falling back to PIL: {e}")
+    
+    def decode_frame(self, jpeg_bytes):
+        """Decode JPEG bytes to a BGR ndarray with libjpeg-turbo (None if unavailable)"""
+        if self._tj is None:
+            return None
+        return self._tj.decode(jpeg_bytes, pixel_format=TJPF_BGR)
+    
+    def fast_jpeg_available(self):
+        """True when libjpeg-turbo can decode/encode preview frames"""
+        return self._tj is not None
+    
+    def invert_jpeg(self, jpeg_bytes, quality=85):
+        """Invert a JPEG (negative to positive) with libjpeg-turbo (None if unavailable)"""
+        frame = self.decode_frame(jpeg_bytes)
+        if frame is None:
+            return None
+        # Invert in place (uint8: ~x == 255 - x)
+        frame ^= 0xFF
+        return self._tj.encode(frame, quality=quality, pixel_format=TJPF_BGR)
+    
+    def _wait_for_data(self, ser, timeout):
+        """Wait until the port has bytes (or timeout) and return the burst that arrived"""
+        if os.name != 'posix':
+            # No selectable fd on Windows - poll
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline and not ser.in_waiting:
+                time.sleep(0.02)
+            if not ser.in_waiting:
+                return ''
+            time.sleep(0.05)  # Let the rest of the burst arrive
+            return ser.read(ser.in_waiting).decode('ascii', errors='ignore')
+        
+        # Block in the kernel until the first byte, then keep reading until
+        # the line goes quiet for SERIAL_BURST_GAP
+        fd = ser.fileno()
+        data = bytearray()
+        wait = timeout
+        while select.select([fd], [], [], wait)[0]:
+            data += ser.read(ser.in_waiting or 1)
+            wait = SERIAL_BURST_GAP
+        return data.decode('ascii', errors='ignore')
+    
+    def _open_port(self, device):
+        """Open a serial port without pulsing DTR, so an Uno/Nano doesn't reboot"""
+        ser = serial.Serial()
+        ser.port = device
+        ser.baudrate = 115200
+        ser.timeout = 3
+        ser.dtr = False
+        ser.rts = False
+        ser.open()
+        
+        if termios is not None:
+            try:
+                # Don't drop DTR on close either, or the next open resets the board
+                attrs = termios.tcgetattr(ser.fileno())
+                attrs[2] &= ~termios.HUPCL
+                termios.tcsetattr(ser.fileno(), termios.TCSANOW, attrs)
+            except (termios.error, ValueError):
+                pass
+        try:
+            # ASYNC_LOW_LATENCY: the kernel pushes received bytes through
+            # immediately instead of on the USB-serial 16 ms latency timer
+            ser.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, ValueError, OSError):
+            # Some drivers refuse the flag but still expose FTDI's timer
+            timer = f'/sys/bus/usb-serial/devices/{os.path.basename(os.path.realpath(device))}/latency_timer'
+            try:
+                with open(timer, 'w') as f:
+                    f.write('1')
+            except OSError:
+                pass
+        return ser
+    
+    def _probe_port(self, device):
+        """Open a port and return it if the film scanner sketch answers, else None"""
+        try:
+            ser = self._open_port(device)
+        except Exception as e:
+            print(f"✗ Failed to connect to {device}: {e}")
+            return None
+        
+        try:
+            # With DTR held low the sketch is normally still running - ask it
+            ser.reset_input_buffer()
+            ser.write(b'?\n')
+            response = self._wait_for_data(ser, ARDUINO_QUERY_TIMEOUT)
+            
+            if not any(key in response for key in ('Film', 'READY', 'Position')):
+                # The board rebooted anyway (first open after power-up, or a
+                # platform that pulses DTR) - wait for its boot banner
+                response += self._wait_for_data(ser, ARDUINO_RESET_TIMEOUT)
+            
+            if 'Film' in response or 'READY' in response or 'Position' in response:
+                return ser
+        except Exception as e:
+            print(f"✗ Failed to connect to {device}: {e}")
+        
+        try:
+            ser.close()
+        except:
+            pass
+        return None
+    
+    def _candidate_ports(self):
+        """Serial devices an Arduino could be on"""
+        if not sys.platform.startswith('linux'):
+            return [port.device for port in serial.tools.list_ports.comports()]
+        
+        # On Linux (the Pi) a glob is all we need - comports() walks sysfs and
+        # reads USB descriptors for every tty only for us to keep .device
+        paths = sorted(glob.glob('/dev/ttyACM*')) + sorted(glob.glob('/dev/ttyUSB*'))
+        paths += ['/dev/serial0', '/dev/ttyAMA0']
+        
+        devices = []
+        seen = set()
+        for path in paths:
+            # /dev/serial0 is a symlink to the Pi's UART - don't open it twice
+            real = os.path.realpath(path)
+            if real not in seen and os.path.exists(real):
+                seen.add(real)
+                devices.append(path)
+        return devices
+    
     def find_arduino(self):
         """Find Arduino on available ports"""
         # Close existing connection if any
@@ -79,48 +478,79 @@ class FilmScanner:
                 pass
             self.arduino = None
         
-        ports = list(serial.tools.list_ports.comports())
+        devices = self._candidate_ports()
+        
+        if not devices:
+            self.arduino = None
+            self.arduino_port = None
+            return False
+        
+        # Try the port that worked last time before probing everything
+        found = []
+        try:
+            with open(ARDUINO_PORT_CACHE) as f:
+                cached = f.read().strip()
+        except OSError:
+            cached = None
+        if cached in devices:
+            ser = self._probe_port(cached)
+            if ser:
+                found = [(cached, ser)]
+            else:
+                devices.remove(cached)
         
-        pi_ports = ['/dev/ttyACM0', '/dev/ttyUSB0', '/dev/serial0', '/dev/ttyAMA0']
-        for port_path in pi_ports:
-            if os.path.exists(port_path):
-                class SimplePort:
-                    def __init__(self, device):
-                        self.device = device
-                ports.append(SimplePort(port_path))
+        if not found and devices:
+            # Probe every candidate at once and take the first that answers;
+            # ports without a sketch would otherwise hold us for a full reset wait
+            pool = ThreadPoolExecutor(max_workers=len(devices))
+            futures = {pool.submit(self._probe_port, device): device for device in devices}
+            winner = None
+            for future in as_completed(futures):
+                if future.result():
+                    winner = future
+                    found = [(futures[future], future.result())]
+                    break
+            
+            def close_port(future):
+                if future.result():
+                    future.result().close()
+            
+            for future in futures:
+                if future is not winner:
+                    future.add_done_callback(close_port)
+            pool.shutdown(wait=False)
         
-        for port in ports:
-            device = port.device if hasattr(port, 'device') else str(port)
+        if found:
+            device, ser = found[0]
+            self.arduino = ser
+            self.arduino_port = device
             
-            try:
-                ser = serial.Serial(device, 115200, timeout=3)
-                time.sleep(2.5)  # Give Arduino time to reset after connection
-                
-                # Clear any startup messages
-                ser.reset_input_buffer()
+            if device != cached:
+                try:
+                    os.makedirs(os.path.dirname(ARDUINO_PORT_CACHE), exist_ok=True)
+                    with open(ARDUINO_PORT_CACHE, 'w') as f:
+                        f.write(device)
+                except OSError:
+                    pass
+            
+            # Drop the probe's status reply so it can't be taken for an ack
+            self.arduino.reset_input_buffer()
+            
+            # Configure step sizes in one write - the first reply also tells
+            # us whether this sketch acknowledges commands
+            init_cmds = [f'm{self.fine_step}', f'l{self.coarse_step}']
+            self.arduino.write(''.join(f'{c}\n' for c in init_cmds).encode())
+            self.arduino_acks = self._read_ack(ARDUINO_ACK_TIMEOUT).endswith('OK\r\n')
+            if self.arduino_acks:
+                for _ in init_cmds[1:]:
+                    self._read_ack(ARDUINO_ACK_TIMEOUT)
+            else:
+                print("⚠ Arduino sketch does not acknowledge commands - reflash for faster moves")
                 time.sleep(0.1)
-                
-                ser.write(b'?\n')
-                time.sleep(0.3)
-                response = ser.read(200).decode('ascii', errors='ignore')
-                
-                if 'Film' in response or 'READY' in response or 'Position' in response:
-                    self.arduino = ser
-                    self.arduino_port = device
-                    
-                    # Configure coarse step size
-                    time.sleep(0.1)
-                    self.arduino.write(f'l{self.coarse_step}\n'.encode())
-                    time.sleep(0.1)
-                    
-                    print(f"✓ Arduino connected on {device}")
-                    self.broadcast_status()
-                    return True
-                
-                ser.close()
-            except Exception as e:
-                print(f"✗ Failed to connect to {device}: {e}")
-                continue
+            
+            print(f"✓ Arduino connected on {device}")
+            self.broadcast_status()
+            return True
         
         self.arduino = None
         self.arduino_port = None
@@ -132,12 +562,11 @@ class FilmScanner:
             return False
         
         try:
-            # Try to read any available data without blocking
-            self.arduino.timeout = 0.1
-            self.arduino.reset_input_buffer()
-            self.arduino.write(b'?\n')
-            time.sleep(0.2)
-            response = self.arduino.read(100).decode('ascii', errors='ignore')
+            # Returns as soon as the status reply has arrived
+            with self.lock:
+                self.arduino.reset_input_buffer()
+                self.arduino.write(b'?\n')
+                response = self._wait_for_data(self.arduino, ARDUINO_QUERY_TIMEOUT)
             
             # Check if we got a valid response
             if response and ('Position' in response or 'READY' in response or 'Film' in response):
@@ -163,8 +592,63 @@ class FilmScanner:
                 return False
         return True
     
+    def _read_ack(self, timeout):
+        """Read the reply to the last command up to and including its OK line"""
+        self.arduino.timeout = timeout
+        return self.arduino.read_until(ARDUINO_ACK).decode('ascii', errors='ignore')
+    
+    def _move_duration(self, cmd):
+        """Seconds the sketch spends stepping for a move (None if unknown)
+        
+        Each step is a HIGH and a LOW pulse of step_delay microseconds.
+        """
+        if cmd[0] in 'fb':
+            steps = self.fine_step
+        elif cmd[0] in 'FB':
+            steps = self.coarse_step
+        elif cmd[0] in 'Hh' and cmd[1:].isdigit():
+            steps = int(cmd[1:])
+        else:
+            # N/R use the sketch's own steps/frame, which we don't track
+            return None
+        return steps * 2 * self.step_delay / 1e6
+    
+    def _move_timeout(self, cmd):
+        """Seconds the ack of a move can take: its steps plus worst-case backlash, plus slack"""
+        duration = self._move_duration(cmd)
+        if duration is None:
+            return ARDUINO_MOVE_TIMEOUT
+        return duration + MAX_BACKLASH_STEPS * 2 * self.step_delay / 1e6 + ARDUINO_ACK_TIMEOUT
+    
+    def send_batch(self, cmds):
+        """Send several non-move commands in one write and wait once for them"""
+        if not self.arduino:
+            return False
+        
+        with self.lock:
+            return self._send_batch(cmds)
+    
+    def _send_batch(self, cmds):
+        try:
+            self.arduino.reset_input_buffer()
+            self.arduino.write(''.join(f'{cmd}\n' for cmd in cmds).encode())
+            if self.arduino_acks:
+                for _ in cmds:
+                    self._read_ack(ARDUINO_ACK_TIMEOUT)
+            else:
+                time.sleep(0.1)
+            return True
+        except serial.SerialException as e:
+            print(f"✗ Serial error sending {cmds}: {e}")
+            return False
+    
     def send(self, cmd, retry=True, update_position=True):
         """Send command to Arduino with error handling and retry - optimized for responsiveness"""
+        # Routes and the background advance share one serial line
+        with self.lock:
+            return self._send(cmd, retry, update_position)
+    
+    def _send(self, cmd, retry, update_position):
         # Quick check - don't verify connection on every command (causes disconnects)
         if not self.arduino:
             print(f"✗ Cannot send command '{cmd}': No Arduino connection")
@@ -175,6 +659,34 @@ class FilmScanner:
             # Clear buffer and send command
             self.arduino.reset_input_buffer()
             self.arduino.write(f"{cmd}\n".encode())
+            is_move = cmd[:1] in ('f', 'F', 'b', 'B', 'H', 'h', 'N', 'R')
+            
+            if self.arduino_acks:
+                # The sketch replies OK once the command (and any move) is done
+                response = self._read_ack(self._move_timeout(cmd) if is_move else ARDUINO_ACK_TIMEOUT)
+                acked = response.endswith('OK\r\n')
+                if not acked:
+                    print(f"⚠ No ack for '{cmd}' from Arduino")
+                elif is_move:
+                    self.last_move_time = time.monotonic()
+                
+                if update_position:
+                    for line in response.splitlines():
+                        if line.startswith('POS:'):
+                            try:
+                                self.position = int(line[4:])
+                            except ValueError:
+                                pass
+                        elif line.startswith('ZEROED'):
+                            self.position = 0
+                # An unacked move may still be stepping (or stalled) - report
+                # failure so callers don't capture or settle on it
+                return acked or not is_move
+            
+            if is_move:
+                # No ack to tell us when stepping ends - settle from its
+                # computed end instead of from when the command went out
+                self.last_move_time = time.monotonic() + (self._move_duration(cmd) or 0)
             
             # Minimal delay for command processing
             time.sleep(0.05)
@@ -226,12 +738,28 @@ class FilmScanner:
             self.broadcast_status()
             return False
     
-    def check_camera(self):
-        """Check if camera is connected without killing gphoto2 or interrupting ops"""
+    def read_preview(self):
+        """Read and remove the JPEG written by the last capture-preview (None if missing)"""
+        return self.gphoto.read_preview()
+    
+    def wait_for_settle(self, settle=MOTOR_SETTLE_TIME):
+        """Sleep only for the part of the settle time not already spent elsewhere"""
+        remaining = settle - (time.monotonic() - self.last_move_time)
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    def check_camera(self, max_age=0):
+        """Check if camera is connected without killing gphoto2 or interrupting ops
+        
+        A result younger than max_age seconds is reused, so periodic status
+        polls from any number of clients share one gphoto2 probe.
+        """
         try:
             # If another camera operation is in progress (preview/capture), don't interrupt it.
             if self.camera_op_lock.locked():
                 return self.camera_connected
+            if max_age and time.time() - self.last_camera_check < max_age:
+                return self.camera_connected
             # Passive detect; no kill here.
             result = subprocess.run(
                 ["gphoto2", "--auto-detect"],
@@ -247,12 +775,19 @@ class FilmScanner:
                         break
             else:
                 self.camera_connected = False
+            self.last_camera_check = time.time()
         except Exception as e:
             print(f"✗ Error checking camera: {e}")
             # Don't change state on exception
         return self.camera_connected
     def _kill_gphoto2(self):
-        """Thoroughly kill any gphoto2 processes and wait for USB release"""
+        """Thoroughly kill any gphoto2 processes and wait for USB release
+        
+        Only needed at startup for strays from earlier runs; our own session
+        is tracked by GPhotoShell and recovered with self.gphoto.close().
+        """
+        # Our own session goes first so the camera is released cleanly
+        self.gphoto.close()
         try:
             # Kill gracefully first
             subprocess.run(["killall", "gphoto2"], 
@@ -283,37 +818,31 @@ class FilmScanner:
         """
         try:
             print("📷 Triggering autofocus...")
-            self._kill_gphoto2()
-            
-            result = subprocess.run(
-                ["gphoto2", "--set-config", "autofocus=1"],
-                capture_output=True, timeout=10, text=True
-            )
+            output = self.gphoto.run("set-config autofocus=1", timeout=10)
+            error_msg = GPhotoShell.error(output)
             
-            if result.returncode == 0:
+            if not error_msg:
                 print("✓ Autofocus triggered successfully")
                 time.sleep(2.0)  # Give camera time to focus
                 return True
             else:
-                print(f"✗ Autofocus failed (return code: {result.returncode})")
-                if result.stderr:
-                    error_msg = result.stderr.strip()
-                    print(f"   Error: {error_msg}")
-                    
-                    # Provide specific guidance based on error
-                    if "not found" in error_msg.lower():
-                        print("   → Camera doesn't have 'autofocus' config option")
-                        print("   → Use manual focus or camera's AF button")
-                    elif "read-only" in error_msg.lower():
-                        print("   → Autofocus setting is read-only on this camera")
-                    elif "PTP" in error_msg or "claim" in error_msg.lower():
-                        print("   → Camera connection issue - check USB mode is PTP")
+                print("✗ Autofocus failed")
+                print(f"   Error: {error_msg}")
+                
+                # Provide specific guidance based on error
+                if "not found" in error_msg.lower():
+                    print("   → Camera doesn't have 'autofocus' config option")
+                    print("   → Use manual focus or camera's AF button")
+                elif "read-only" in error_msg.lower():
+                    print("   → Autofocus setting is read-only on this camera")
+                elif "PTP" in error_msg or "claim" in error_msg.lower():
+                    print("   → Camera connection issue - check USB mode is PTP")
                 
                 return False
                 
         except subprocess.TimeoutExpired:
             print("✗ Autofocus timeout - camera not responding")
-            self._kill_gphoto2()
+            self.gphoto.close()
             return False
         except Exception as e:
             print(f"✗ Autofocus error: {e}")
@@ -322,17 +851,15 @@ class FilmScanner:
     def check_viewfinder_state(self):
         """Query viewfinder state without killing other gphoto2 ops"""
         try:
-            result = subprocess.run(
-                ["gphoto2", "--get-config", "viewfinder"],
-                capture_output=True, timeout=10, text=True
-            )
-            if result.returncode == 0 and result.stdout:
-                if "Current: 1" in result.stdout or "Current: On" in result.stdout:
+            output = self.gphoto.run("get-config viewfinder", timeout=10)
+            error_msg = GPhotoShell.error(output)
+            if not error_msg:
+                if "Current: 1" in output or "Current: On" in output:
                     self.viewfinder_enabled = True
-                elif "Current: 0" in result.stdout or "Current: Off" in result.stdout:
+                elif "Current: 0" in output or "Current: Off" in output:
                     self.viewfinder_enabled = False
-            elif result.stderr:
-                print(f"viewfinder query stderr: {result.stderr.strip()}")
+            else:
+                print(f"viewfinder query error: {error_msg}")
         except Exception as e:
             print(f"✗ Error checking viewfinder: {e}")
         return self.viewfinder_enabled
@@ -348,27 +875,22 @@ class FilmScanner:
             
             # Not enabled, so enable it
             print("   Enabling viewfinder...")
-            self._kill_gphoto2()
+            output = self.gphoto.run("set-config viewfinder=1", timeout=10)
+            error_msg = GPhotoShell.error(output)
             
-            result = subprocess.run(
-                ["gphoto2", "--set-config", "viewfinder=1"],
-                capture_output=True, timeout=10, text=True
-            )
-            
-            if result.returncode == 0:
+            if not error_msg:
                 self.viewfinder_enabled = True
                 print("✓ Viewfinder enabled")
                 time.sleep(0.5)  # Give camera time to enter live view
                 return True
             else:
-                print(f"✗ Failed to enable viewfinder (return code: {result.returncode})")
-                if result.stderr:
-                    print(f"   Error: {result.stderr.strip()}")
+                print("✗ Failed to enable viewfinder")
+                print(f"   Error: {error_msg}")
                 return False
                 
         except subprocess.TimeoutExpired:
             print("✗ Viewfinder enable timeout")
-            self._kill_gphoto2()
+            self.gphoto.close()
             return False
         except Exception as e:
             print(f"✗ Viewfinder enable error: {e}")
@@ -378,24 +900,19 @@ class FilmScanner:
         """Disable camera viewfinder to save battery"""
         try:
             print("📷 Disabling viewfinder...")
-            self._kill_gphoto2()
-            
-            result = subprocess.run(
-                ["gphoto2", "--set-config", "viewfinder=0"],
-                capture_output=True, timeout=10, text=True
-            )
+            output = self.gphoto.run("set-config viewfinder=0", timeout=10)
             
-            if result.returncode == 0:
+            if not GPhotoShell.error(output):
                 self.viewfinder_enabled = False
                 print("✓ Viewfinder disabled")
                 return True
             else:
-                print(f"✗ Failed to disable viewfinder (return code: {result.returncode})")
+                print("✗ Failed to disable viewfinder")
                 return False
                 
         except subprocess.TimeoutExpired:
             print("✗ Viewfinder disable timeout")
-            self._kill_gphoto2()
+            self.gphoto.close()
             return False
         except Exception as e:
             print(f"✗ Viewfinder disable error: {e}")
@@ -406,38 +923,34 @@ class FilmScanner:
         try:
             # Ensure exclusive access
             self.camera_op_lock.acquire()
-            # Clean any stray gphoto2 from previous ops
-            self._kill_gphoto2()
+            # Never shoot while a pre-queued advance is still moving the film
+            # (only /api/capture consumes it)
+            self.wait_for_prequeued_advance()
             print("\n📷 Capturing image...")
-            result = subprocess.run(
-                ["gphoto2", "--capture-image"],
-                capture_output=True, timeout=30, text=True
-            )
-            print(f"   Return code: {result.returncode}")
-            if result.stdout:
-                print(f"   stdout: {result.stdout.strip()}")
-            if result.stderr:
-                print(f"   stderr: {result.stderr.strip()}")
-            # Success detection: allow some transient non-zero errors if shutter likely fired
-            success_code = (result.returncode == 0)
+            output = self.gphoto.run("capture-image", timeout=30)
+            if output.strip():
+                print(f"   output: {output.strip()}")
+            error_msg = GPhotoShell.error(output)
+            # Success detection: allow some transient errors if shutter likely fired
+            success_code = not error_msg
             non_fatal = False
-            if not success_code and result.stderr:
-                low = result.stderr.lower()
+            if not success_code:
+                low = error_msg.lower()
                 non_fatal = any(k in low for k in ["ptp i/o error", "device busy", "resource busy", "usb device reset", "i/o in progress"])
             if success_code or non_fatal:
                 print("✓ Capture triggered")
                 return True
             # If failed and retry is allowed, try once more after a short reset
             if retry:
-                print("↻ Retry capture after resetting gphoto2...")
-                self._kill_gphoto2()
+                print("↻ Retry capture after restarting gphoto2 session...")
+                self.gphoto.close()
                 time.sleep(0.5)
                 return self.capture_image(retry=False)
             print("✗ Capture failed")
             return False
         except Exception as e:
             print(f"✗ Capture error: {e}")
-            self._kill_gphoto2()
+            self.gphoto.close()
             return False
         finally:
             if self.camera_op_lock.locked():
@@ -445,8 +958,35 @@ class FilmScanner:
                     self.camera_op_lock.release()
                 except RuntimeError:
                     pass
-    def save_state(self):
-        """Save scanning state"""
+    def save_state(self, force=False):
+        """Save scanning state
+        
+        Unless forced, a save within STATE_SAVE_INTERVAL of the last one is
+        deferred to a single write at the end of that interval.
+        """
+        if not self.state_file:
+            return
+        
+        with self._state_lock:
+            wait = STATE_SAVE_INTERVAL - (time.monotonic() - self._last_save_time)
+            if not force and wait > 0:
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(wait, self._flush_state)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+                return
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._write_state()
+    
+    def _flush_state(self):
+        """Timer callback: write the state deferred by save_state()"""
+        with self._state_lock:
+            self._save_timer = None
+            self._write_state()
+    
+    def _write_state(self):
         if not self.state_file:
             return
         
@@ -459,20 +999,34 @@ class FilmScanner:
             'frame_advance': self.frame_advance,
             'frame_positions': self.frame_positions,
             'mode': self.mode,
-            'auto_advance': self.auto_advance,
-            'updated': datetime.now().isoformat()
+            'auto_advance': self.auto_advance
         }
         
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
+        # Skip the write if nothing but the timestamp would change
+        content = _dump_state(state)
+        if (self.state_file, content) == self._last_saved_state:
+            return
+        state['updated'] = datetime.now().isoformat()
+        
+        # Compact JSON to a temp file, then rename over the old state so a
+        # power cut mid-write can never leave a truncated file on the SD card
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(_dump_state(state))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.state_file)
+        self._last_save_time = time.monotonic()
+        self._last_saved_state = (self.state_file, content)
     
     def load_state(self, roll_folder):
         """Load scanning state"""
         state_path = os.path.join(roll_folder, '.scan_state.json')
         
         if os.path.exists(state_path):
-            with open(state_path, 'r') as f:
-                state = json.load(f)
+            with open(state_path, 'rb') as f:
+                data = f.read()
+                state = _json_fast.loads(data) if _json_fast else json.loads(data)
                 self.frame_count = state.get('frame_count', 0)
                 self.strip_count = state.get('strip_count', 0)
                 self.frames_in_strip = state.get('frames_in_strip', 0)
@@ -484,6 +1038,45 @@ class FilmScanner:
                 return True
         return False
     
+    def prequeue_advance(self):
+        """Start the next frame advance in the background right after a capture"""
+        steps = self.frame_advance
+        
+        def advance():
+            self.prequeued_advance = self.send(f'H{steps}')
+            self.broadcast_status()
+        
+        self.prequeued_advance = False
+        self.prequeued_steps = steps
+        self.advance_thread = threading.Thread(target=advance, daemon=True)
+        self.advance_thread.start()
+    
+    def wait_for_prequeued_advance(self):
+        """Block until a pre-queued advance has stopped moving, leaving it pending"""
+        thread = self.advance_thread
+        if thread is not None:
+            thread.join()
+    
+    def take_prequeued_advance(self):
+        """Wait for a pre-queued advance; True if the film already moved for this capture"""
+        thread, self.advance_thread = self.advance_thread, None
+        if thread is None:
+            return False
+        thread.join()
+        return self.prequeued_advance
+    
+    def cancel_prequeued_advance(self):
+        """Reverse a pre-queued advance nobody will capture after (same film still loaded)"""
+        if self.take_prequeued_advance():
+            print(f"↩ Reversing unused advance of {self.prequeued_steps} steps")
+            self.send(f'h{self.prequeued_steps}')
+    
+    def discard_prequeued_advance(self):
+        """Forget a pre-queued advance without moving - the film it moved has
+        been swapped out, so reversing it would only shift the new film"""
+        if self.take_prequeued_advance():
+            print(f"⏭ Dropping unused advance of {self.prequeued_steps} steps (film changed)")
+    
     def advance_frame(self):
         """Advance one full frame forward using calibrated distance"""
         if self.frame_advance:
@@ -499,7 +1092,7 @@ class FilmScanner:
     def backup_frame(self):
         """Backup one full frame using calibrated distance"""
         if self.frame_advance:
-            success = self.send(f'H-{self.frame_advance}')
+            success = self.send(f'h{self.frame_advance}')
             if success:
                 self.status_msg = f"Backed up {self.frame_advance} steps"
                 return True
@@ -564,6 +1157,7 @@ def new_roll():
     os.makedirs(scanner.roll_folder, exist_ok=True)
     
     scanner.state_file = os.path.join(scanner.roll_folder, '.scan_state.json')
+    scanner.discard_prequeued_advance()
     
     resume = data.get('resume', False)
     if os.path.exists(scanner.state_file) and resume:
@@ -578,7 +1172,7 @@ def new_roll():
         scanner.status_msg = f"New roll: {roll_name}"
     
     scanner.roll_name = roll_name
-    scanner.save_state()
+    scanner.save_state(force=True)
     scanner.broadcast_status()
     
     return jsonify({'success': True})
@@ -588,23 +1182,39 @@ def move():
     data = request.json
     direction = data.get('direction', 'forward')
     size = data.get('size', 'fine')
+    # Jogs the client coalesced while the previous move was in flight
+    try:
+        count = int(data.get('count', 1))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid jog count'})
+    if not 1 <= count <= MAX_JOG_BATCH:
+        return jsonify({'success': False, 'message': 'Invalid jog count'})
+    
+    step = scanner.coarse_step if size == 'coarse' else scanner.fine_step
+    step *= count
+    if step >= 10000:
+        return jsonify({'success': False, 'message': 'Move too large'})
     
-    if direction == 'forward':
+    if count > 1:
+        # One exact-step move instead of `count` round trips
+        cmd = f"{'H' if direction == 'forward' else 'h'}{step}"
+    elif direction == 'forward':
         cmd = 'F' if size == 'coarse' else 'f'
     else:
         cmd = 'B' if size == 'coarse' else 'b'
     
-    # Send command without waiting for position update (for speed)
-    success = scanner.send(cmd, update_position=False)
+    # An acking sketch reports the real position (backlash included) with
+    # its ack for free; otherwise skip the slow status query and estimate
+    success = scanner.send(cmd, update_position=scanner.arduino_acks)
     
-    if success:
+    if success and not scanner.arduino_acks:
         # Update position estimate locally for immediate feedback
-        step = scanner.coarse_step if size == 'coarse' else scanner.fine_step
         if direction == 'forward':
             scanner.position += step
         else:
             scanner.position -= step
-        
+    
+    if success:
         scanner.status_msg = f"{'→' if direction == 'forward' else '←'} {step} steps"
     else:
         scanner.status_msg = "❌ Motor move failed - Check Arduino connection"
@@ -616,12 +1226,14 @@ def move():
 @app.route('/api/advance_frame', methods=['POST'])
 def advance_frame():
     """Advance one frame"""
-    success = scanner.advance_frame()
+    # A pending auto-advance already put the film on the next frame
+    success = scanner.take_prequeued_advance() or scanner.advance_frame()
     scanner.broadcast_status()
     return jsonify({'success': success})
 @app.route('/api/backup_frame', methods=['POST'])
 def backup_frame():
     """Backup one frame"""
+    scanner.cancel_prequeued_advance()
     success = scanner.backup_frame()
     scanner.broadcast_status()
     return jsonify({'success': success})
@@ -629,6 +1241,8 @@ def backup_frame():
 def toggle_mode():
     """Toggle mode"""
     scanner.mode = 'calibrated' if scanner.mode == 'manual' else 'manual'
+    if scanner.mode == 'manual':
+        scanner.cancel_prequeued_advance()
     scanner.status_msg = f"Mode: {scanner.mode.upper()}"
     scanner.save_state()
     scanner.broadcast_status()
@@ -638,6 +1252,8 @@ def toggle_auto_advance():
     """Toggle auto advance"""
     if scanner.mode == 'calibrated':
         scanner.auto_advance = not scanner.auto_advance
+        if not scanner.auto_advance:
+            scanner.cancel_prequeued_advance()
         scanner.status_msg = f"Auto-advance: {'ON' if scanner.auto_advance else 'OFF'}"
         scanner.save_state()
     else:
@@ -656,8 +1272,8 @@ def zero_position():
         scanner.status_msg = "❌ Zero failed - Check Arduino"
     scanner.broadcast_status()
     return jsonify({'success': success})
-# Autofocus button removed - autofocus is now only used internally during capture
-# The autofocus() method is kept for internal use in capture_image()
+# Autofocus button removed - capture_image() never triggers AF; the camera's
+# continuous AF handles focus. autofocus() is kept for cameras that need it.
 @app.route('/api/test_capture', methods=['POST'])
 def test_capture():
     """Test camera capture without saving to roll (for debugging)"""
@@ -716,15 +1332,22 @@ def capture():
     if not scanner.roll_name:
         return jsonify({'success': False, 'message': 'Create roll first'})
     
-    if not scanner.check_camera():
+    # A recent detection is good enough here - capture_image() fails cleanly
+    # if the camera has gone since, and a fresh probe would run before the
+    # motor even starts
+    if not scanner.check_camera(max_age=CAMERA_CHECK_INTERVAL):
         return jsonify({'success': False, 'message': 'Camera not connected'})
     
     # Auto-advance before capture (for frames 2+)
-    if scanner.mode == 'calibrated' and scanner.auto_advance and scanner.frames_in_strip > 0:
-        if scanner.frame_advance:
+    auto_advance = (scanner.mode == 'calibrated' and scanner.auto_advance
+                    and scanner.frames_in_strip > 0 and scanner.frame_advance)
+    if auto_advance:
+        # Normally already done in the background after the previous capture
+        if not scanner.take_prequeued_advance():
             if not scanner.send(f'H{scanner.frame_advance}'):
                 return jsonify({'success': False, 'message': 'Auto-advance failed - Check Arduino'})
-            time.sleep(0.5)
+        # send() returns once the move is done; settle from that point
+        scanner.wait_for_settle()
     
     scanner.status_msg = "Capturing..."
     scanner.broadcast_status()
@@ -733,6 +1356,10 @@ def capture():
     
     if success:
         scanner.status_msg = f"✓ Frame {scanner.frame_count} (Strip {scanner.strip_count})"
+        if auto_advance:
+            # capture-image returns once the shot is done - move on to the
+            # next frame while the user looks at this one
+            scanner.prequeue_advance()
     else:
         scanner.status_msg = "❌ Capture failed!"
     
@@ -750,6 +1377,8 @@ def calibrate():
     if scanner.strip_count > 0:
         return jsonify({'success': False, 'message': 'Already calibrated'})
     
+    scanner.cancel_prequeued_advance()
+    
     if action == 'capture_frame1':
         frame1_pos = scanner.position
         if not scanner.capture_image():
@@ -769,7 +1398,7 @@ def calibrate():
         
         scanner.strip_count = 1
         scanner.mode = 'calibrated'
-        scanner.save_state()
+        scanner.save_state(force=True)
         scanner.status_msg = f"✓ Calibrated: {scanner.frame_advance} steps/frame"
         scanner.broadcast_status()
         
@@ -788,13 +1417,17 @@ def new_strip():
     data = request.json
     action = data.get('action', 'start')  # start, capture_first
     
+    # The last strip is done and has been swapped for the new one - drop the
+    # auto-advance that followed its final frame without moving the new strip
+    scanner.discard_prequeued_advance()
+    
     if action == 'capture_first':
         if not scanner.capture_image():
             return jsonify({'success': False, 'message': 'Capture failed'})
         
         scanner.strip_count += 1
         scanner.frames_in_strip = 1
-        scanner.save_state()
+        scanner.save_state(force=True)
         scanner.status_msg = f"✓ Strip {scanner.strip_count} started"
         scanner.broadcast_status()
         
@@ -816,16 +1449,10 @@ def get_preview():
     scanner.status_msg = "Getting live preview..."
     scanner.broadcast_status()
     
-    # Create temp directory
-    temp_dir = tempfile.mkdtemp()
-    original_dir = os.getcwd()
-    
     try:
         # Ensure exclusive access to gphoto2 during preview
         scanner.camera_op_lock.acquire()
         print("\n📷 Capturing live preview from camera...")
-        scanner._kill_gphoto2()
-        time.sleep(0.5)
         
         # CRITICAL: Enable viewfinder first (Canon R100 requirement)
         # Per r100-liveview-testing.md: viewfinder MUST be enabled for --capture-preview to work
@@ -839,74 +1466,52 @@ def get_preview():
                 'message': 'Failed to enable viewfinder. Required for live preview.'
             })
         
-        # Change to temp directory
-        os.chdir(temp_dir)
-        print(f"   Working directory: {temp_dir}")
-        
         # Step 2: Capture preview with viewfinder enabled
         print("   Step 2: Capturing preview (viewfinder enabled)...")
-        print("   Running: gphoto2 --capture-preview --force-overwrite")
-        result = subprocess.run(
-            ["gphoto2", "--capture-preview", "--force-overwrite"],
-            capture_output=True,
-            timeout=10,
-            text=True
-        )
-        
-        # Restore directory
-        os.chdir(original_dir)
-        
-        print(f"   Return code: {result.returncode}")
-        if result.stdout:
-            print(f"   stdout: {result.stdout.strip()}")
-        if result.stderr:
-            print(f"   stderr: {result.stderr.strip()}")
-        
-        time.sleep(0.2)
-        
-        # Check what files were created
-        files = os.listdir(temp_dir)
-        print(f"   Files in directory: {files}")
-        
-        # Look for preview.jpg (default name for --capture-preview)
-        preview_path = os.path.join(temp_dir, "preview.jpg")
+        output = scanner.gphoto.run("capture-preview", timeout=10)
+        if output.strip():
+            print(f"   output: {output.strip()}")
         
-        if not os.path.exists(preview_path):
-            # Look for any JPG files
-            preview_files = [f for f in files if f.lower().endswith(('.jpg', '.jpeg'))]
-            
-            if not preview_files:
-                print("✗ No preview file created")
-                print("   → This shouldn't happen if viewfinder was enabled")
-                print("   → Check camera is in PTP mode")
-                scanner.status_msg = "✗ No preview file"
-                scanner.broadcast_status()
-                return jsonify({
-                    'success': False,
-                    'message': 'No preview file created despite viewfinder being enabled.'
-                })
-            
-            preview_path = os.path.join(temp_dir, preview_files[0])
-            print(f"   Using: {preview_files[0]}")
-        else:
-            print(f"   Found: preview.jpg")
+        # Pull the preview into memory once - everything below works on bytes
+        jpeg_bytes = scanner.read_preview()
+        if jpeg_bytes is None:
+            print("✗ No preview file created")
+            print("   → This shouldn't happen if viewfinder was enabled")
+            print("   → Check camera is in PTP mode")
+            scanner.status_msg = "✗ No preview file"
+            scanner.broadcast_status()
+            return jsonify({
+                'success': False,
+                'message': 'No preview file created despite viewfinder being enabled.'
+            })
         
-        # Read the image
-        file_size = os.path.getsize(preview_path)
-        print(f"   Image size: {file_size} bytes")
+        print(f"   Image size: {len(jpeg_bytes)} bytes")
         
         # Check minimum size
-        if file_size < 1000:
+        if len(jpeg_bytes) < 1000:
             print("✗ Image too small (corrupt)")
             scanner.status_msg = "✗ Preview corrupt"
             scanner.broadcast_status()
             return jsonify({'success': False, 'message': 'Preview image corrupt or too small'})
         
-        # Convert negative to positive if PIL is available
-        if PIL_AVAILABLE:
+        # Convert negative to positive - libjpeg-turbo first, PIL as fallback
+        image_data = None
+        if scanner.fast_jpeg_available():
+            try:
+                print("   Converting negative to positive (libjpeg-turbo)...")
+                jpeg = scanner.invert_jpeg(jpeg_bytes, quality=85)
+                image_data = base64.b64encode(jpeg).decode('utf-8')
+                
+                print("   ✓ Converted to positive")
+                
+            except Exception as e:
+                print(f"   ⚠ libjpeg-turbo conversion failed: {e}")
+                image_data = None
+        
+        if image_data is None and PIL_AVAILABLE:
             try:
                 print("   Converting negative to positive...")
-                img = Image.open(preview_path)
+                img = Image.open(BytesIO(jpeg_bytes))
                 
                 # Convert to RGB if needed
                 if img.mode != 'RGB':
@@ -916,7 +1521,6 @@ def get_preview():
                 img_inverted = ImageOps.invert(img)
                 
                 # Save as JPG to buffer
-                from io import BytesIO
                 buffer = BytesIO()
                 img_inverted.save(buffer, format='JPEG', quality=85)
                 image_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
@@ -925,41 +1529,28 @@ def get_preview():
                 
             except Exception as e:
                 print(f"   ⚠ Conversion failed: {e}, using original")
-                with open(preview_path, 'rb') as f:
-                    image_data = base64.b64encode(f.read()).decode('utf-8')
-        else:
+                image_data = base64.b64encode(jpeg_bytes).decode('utf-8')
+        elif image_data is None:
             # No PIL, just encode original
             print("   (PIL not available, showing as negative)")
-            with open(preview_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
+            image_data = base64.b64encode(jpeg_bytes).decode('utf-8')
         
         scanner.status_msg = "✓ Live preview ready"
         scanner.broadcast_status()
         
         print(f"✓ Live preview successful")
         
-        # Clean up any lingering gphoto2 processes after preview
-        scanner._kill_gphoto2()
-        
         return jsonify({'success': True, 'image': image_data})
         
     except subprocess.TimeoutExpired:
-        scanner._kill_gphoto2()  # Clean up on timeout
-        try:
-            os.chdir(original_dir)
-        except:
-            pass
+        scanner.gphoto.close()  # Restart our session on timeout
         print("✗ Preview timeout")
         scanner.status_msg = "✗ Preview timeout"
         scanner.broadcast_status()
         return jsonify({'success': False, 'message': 'Preview capture timeout'})
         
     except Exception as e:
-        try:
-            os.chdir(original_dir)
-        except:
-            pass
-        scanner._kill_gphoto2()  # Clean up on error
+        scanner.gphoto.close()  # Restart our session on error
         print(f"✗ Preview error: {e}")
         traceback.print_exc()
         scanner.status_msg = f"✗ Error"
@@ -972,14 +1563,6 @@ def get_preview():
                 scanner.camera_op_lock.release()
             except RuntimeError:
                 pass
-        try:
-            os.chdir(original_dir)
-        except:
-            pass
-        try:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        except:
-            pass
 @app.route('/api/update_step_sizes', methods=['POST'])
 def update_step_sizes():
     """Update motor step sizes"""
@@ -994,10 +1577,8 @@ def update_step_sizes():
         scanner.fine_step = int(fine_step)
         scanner.coarse_step = int(coarse_step)
         
-        # Update coarse step size on Arduino
-        if scanner.arduino:
-            scanner.arduino.write(f'l{scanner.coarse_step}\n'.encode())
-            time.sleep(0.1)
+        # Update both step sizes on Arduino in one transaction
+        scanner.send_batch([f'm{scanner.fine_step}', f'l{scanner.coarse_step}'])
         
         scanner.status_msg = f"Step sizes: Fine={scanner.fine_step}, Coarse={scanner.coarse_step}"
         scanner.broadcast_status()
@@ -1016,7 +1597,7 @@ def handle_connect():
 @socketio.on('request_status')
 def handle_status_request():
     """Handle status request"""
-    scanner.check_camera()
+    scanner.check_camera(max_age=CAMERA_CHECK_INTERVAL)
     emit('status_update', scanner.get_status())
 if __name__ == '__main__':
     # Handle command line arguments
@@ -1024,6 +1605,8 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Film Scanner Web Application')
     parser.add_argument('--reset', action='store_true', help='Reset configuration and run setup')
     parser.add_argument('--config', action='store_true', help='Show current configuration')
+    parser.add_argument('--prefix', type=parse_prefix_len, default=24,
+                        help='Network prefix length to scan for the Pi during first-run setup (default: 24)')
     args = parser.parse_args()
     
     # Initialize configuration manager
@@ -1044,7 +1627,7 @@ if __name__ == '__main__':
     print("   FILM SCANNER WEB APPLICATION")
     print("="*60 + "\n")
     
-    config = config_mgr.get_config()
+    config = config_mgr.get_config(args.prefix)
     if not config:
         print("\n❌ Setup failed or cancelled\n")
         sys.exit(1)
@@ -1069,9 +1652,13 @@ if __name__ == '__main__':
     # Check for camera
     print("\n📷 Camera Setup")
     print("  • USB Camera: gphoto2 for capture and preview")
-    print("  • Autofocus: Automatic during capture")
+    print("  • Autofocus: Camera's continuous AF (not triggered per capture)")
     print("  • Preview: On-demand via web interface")
     
+    # Open the camera session in the background so the first preview or
+    # capture doesn't pay the USB/PTP init
+    threading.Thread(target=scanner.gphoto.open, daemon=True).start()
+    
     # Start web server
     host = '0.0.0.0'
     port = config.get('port', 5000)
@@ -293,6 +293,8 @@ class FilmScanner:
 
         self.lock = threading.Lock()
         self.camera_op_lock = threading.Lock()
+        # Serializes preview worker start/stop so concurrent callers can't spawn two loops
+        self._lifecycle_lock = threading.Lock()
 
         self.preview_enabled = False
         self._preview_thread = None
@@ -397,7 +399,7 @@ class FilmScanner:
                 except RuntimeError: pass
 
     # ---------- preview worker ----------
-    def _preview_loop(self):
+    def _preview_loop(self, stop):
         self.preview_enabled = True
         try:
             subprocess.run(["gphoto2", "--set-config", "viewfinder=1"],
@@ -406,7 +408,7 @@ class FilmScanner:
             ringlog.add(f"enable viewfinder error: {e}")
 
         ringlog.add("Preview loop started")
-        while not self._preview_stop.is_set():
+        while not stop.is_set():
             # dynamic FPS
             interval = 1.0 / max(1, int(self._preview_fps))
 
@@ -448,18 +450,30 @@ class FilmScanner:
         ringlog.add("Preview loop stopped")
 
     def start_preview(self):
-        if self._preview_thread and self._preview_thread.is_alive():
-            return True
-        self._preview_stop.clear()
-        self._preview_thread = threading.Thread(target=self._preview_loop, daemon=True)
-        self._preview_thread.start()
+        with self._lifecycle_lock:
+            if self._preview_thread and self._preview_thread.is_alive():
+                if not self._preview_stop.is_set():
+                    return True
+                # A stopped worker still finishing its last frame: let it exit
+                # (and disable the viewfinder) before the new one starts
+                self._preview_thread.join()
+            # Each worker gets its own stop event, so a slow old loop can never
+            # be revived by clearing a shared one
+            self._preview_stop = threading.Event()
+            self._preview_thread = threading.Thread(target=self._preview_loop,
+                                                    args=(self._preview_stop,), daemon=True)
+            self._preview_thread.start()
         return True
 
     def stop_preview(self):
-        self._preview_stop.set()
-        if self._preview_thread:
-            self._preview_thread.join(timeout=2)
-        self._preview_thread = None
+        with self._lifecycle_lock:
+            self._preview_stop.set()
+            if self._preview_thread:
+                self._preview_thread.join(timeout=2)
+                # Keep the reference while the worker is still running so
+                # start_preview can wait for it instead of spawning a second loop
+                if not self._preview_thread.is_alive():
+                    self._preview_thread = None
         return True
 
     def status(self):
@@ -577,15 +591,18 @@ def api_logs():
 @app.route("/preview.mjpg")
 def preview_mjpg():
     boundary = "frame"
+    part_header = b"--" + boundary.encode() + b"\r\nContent-Type: image/jpeg\r\n"
     def gen():
         scanner.start_preview()
         while True:
             frame = scanner._last_frame
             if frame:
-                yield (b"--" + boundary.encode() + b"\r\n"
-                       b"Content-Type: image/jpeg\r\n"
-                       b"Content-Length: " + str(len(frame)).encode() + b"\r\n\r\n" +
-                       frame + b"\r\n")
+                # Yield header and payload separately so the JPEG is never
+                # copied into a concatenated part buffer
+                yield (part_header +
+                       b"Content-Length: " + str(len(frame)).encode() + b"\r\n\r\n")
+                yield frame
+                yield b"\r\n"
             else:
                 time.sleep(0.03)
     return Response(gen(), mimetype=f"multipart/x-mixed-replace; boundary=%s" % boundary)